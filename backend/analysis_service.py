@@ -3,18 +3,154 @@
 """
 Analysis service for sending URLs to n8n webhook
 """
+import asyncio
 import httpx
-from typing import List, Dict, Any
-from backend.config import get_settings
+import msgspec
+import redis
+from cachetools import TTLCache
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+from backend.config import settings
+from backend.cache import get_async_redis, bump_generation, ANALYSES_GENERATION_KEY
+from backend.models import AnalysisResult
+
+
+# Typed, C-level decoder for n8n webhook responses
+_decode_result = msgspec.json.Decoder(AnalysisResult).decode
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL for cache lookups (trim, lowercase scheme and host)"""
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        # Malformed input (e.g. "http://[abc") is keyed as-is and left to
+        # fail as a per-URL error instead of aborting the batch
+        return url
+    return urlunsplit(parts._replace(
+        scheme=parts.scheme.lower(),
+        netloc=parts.netloc.lower()
+    ))
+
+
+def _as_repeat(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Mark a result reused for a repeated URL in the same batch as cached"""
+    if result['status'] != 'success':
+        return result
+    return {**result, 'cached': True}
+
+
+class AdmissionController:
+    """
+    Concurrency limiter for n8n calls whose limit can change at runtime
+    
+    asyncio.Semaphore has no supported way to resize; this keeps an
+    explicit active count behind an asyncio.Condition so raising the
+    limit wakes waiters and lowering it lets in-flight calls drain.
+    """
+    
+    def __init__(self, limit: int):
+        self._cond = asyncio.Condition()
+        self._active = 0
+        self._limit = limit
+    
+    @property
+    def limit(self) -> int:
+        """Maximum number of concurrent calls"""
+        return self._limit
+    
+    @property
+    def active(self) -> int:
+        """Number of calls currently admitted"""
+        return self._active
+    
+    async def acquire(self):
+        """Wait until a slot is free and take it"""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self._limit)
+            self._active += 1
+    
+    async def release(self):
+        """Give a slot back and wake one waiter"""
+        # Free the slot before any await so a cancelled release can't leak
+        # it, and shield the wake-up so cancellation can't skip it either
+        self._active -= 1
+        await asyncio.shield(self._notify())
+    
+    async def _notify(self):
+        """Wake one waiter to re-check the limit"""
+        async with self._cond:
+            self._cond.notify(1)
+    
+    async def resize(self, limit: int):
+        """Change the limit and let waiters re-check it"""
+        async with self._cond:
+            self._limit = limit
+            self._cond.notify_all()
+    
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
 
 
 class AnalysisService:
     """Service for analyzing URLs via n8n webhook"""
     
-    def __init__(self):
-        settings = get_settings()
+    def __init__(self, client: httpx.AsyncClient):
         self.webhook_url = settings.n8n_webhook_url
-        self.timeout = 60.0  # 60 seconds timeout per request
+        # Shared client owned by the app lifespan (keep-alive across calls)
+        self.client = client
+        # Cap in-flight webhook calls so bulk fan-out doesn't flood n8n
+        self.admission = AdmissionController(settings.n8n_max_concurrency)
+        # Recent successful results: process-local first, then Redis
+        self._cache = TTLCache(
+            maxsize=settings.url_cache_maxsize,
+            ttl=settings.url_cache_ttl
+        )
+        self._cache_ttl = settings.url_cache_ttl
+        self._redis = get_async_redis()
+    
+    async def _get_cached(self, key: str) -> Optional[AnalysisResult]:
+        """Look up a cached analysis in memory, then in Redis"""
+        data = self._cache.get(key)
+        if data is not None or self._redis is None:
+            return data
+        
+        try:
+            blob = await self._redis.get(f"url_analysis:{key}")
+        except redis.RedisError as e:
+            print(f"Error reading cached analysis for {key}: {e}")
+            return None
+        
+        if blob is None:
+            return None
+        try:
+            data = _decode_result(blob)
+        except msgspec.DecodeError as e:
+            print(f"Error decoding cached analysis for {key}: {e}")
+            return None
+        self._cache[key] = data
+        return data
+    
+    async def _set_cached(self, key: str, data: AnalysisResult, blob: bytes):
+        """Store a successful analysis in memory and in Redis"""
+        self._cache[key] = data
+        if self._redis is None:
+            return
+        
+        try:
+            await self._redis.setex(f"url_analysis:{key}", self._cache_ttl, blob)
+        except redis.RedisError as e:
+            print(f"Error caching analysis for {key}: {e}")
+    
+    async def _invalidate_analyses(self):
+        """Retire cached analysis listings so newly inserted rows show up"""
+        if self._redis is not None:
+            await bump_generation(self._redis, ANALYSES_GENERATION_KEY)
     
     async def analyze_single_url(self, url: str) -> Dict[str, Any]:
         """
@@ -24,20 +160,41 @@ class AnalysisService:
             url: URL to analyze
             
         Returns:
-            Analysis result or error
+            Analysis result or error; 'data' is an AnalysisResult struct and
+            'cached' is True when no new analysis row was written
         """
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
+        result = await self._analyze_url(url)
+        if result.get('cached') is False:
+            await self._invalidate_analyses()
+        return result
+    
+    async def _analyze_url(self, url: str) -> Dict[str, Any]:
+        """Analyze a single URL without invalidating cached listings"""
+        key = normalize_url(url)
+        data = await self._get_cached(key)
+        if data is not None:
+            return {
+                'url': url,
+                'status': 'success',
+                'cached': True,
+                'data': data
+            }
+        
+        async with self.admission:
+            try:
+                response = await self.client.post(
                     self.webhook_url,
                     json={"url": url}
                 )
                 
                 if response.status_code == 200:
+                    data = _decode_result(response.content)
+                    await self._set_cached(key, data, response.content)
                     return {
                         'url': url,
                         'status': 'success',
-                        'data': response.json()
+                        'cached': False,
+                        'data': data
                     }
                 else:
                     return {
@@ -45,22 +202,70 @@ class AnalysisService:
                         'status': 'error',
                         'error': f"HTTP {response.status_code}: {response.text}"
                     }
-        except httpx.TimeoutException:
-            return {
-                'url': url,
-                'status': 'error',
-                'error': 'Request timeout (>60s)'
-            }
-        except Exception as e:
-            return {
-                'url': url,
-                'status': 'error',
-                'error': str(e)
-            }
+            except httpx.TimeoutException:
+                return {
+                    'url': url,
+                    'status': 'error',
+                    'error': 'Request timeout (>60s)'
+                }
+            except Exception as e:
+                return {
+                    'url': url,
+                    'status': 'error',
+                    'error': str(e)
+                }
+    
+    async def stream_single_url(self, url: str) -> AsyncIterator[bytes]:
+        """
+        Stream n8n's response for a single URL as it arrives
+        
+        Args:
+            url: URL to analyze
+            
+        Yields:
+            Response body chunks as they arrive, or the cached result as a
+            single chunk
+            
+        Raises:
+            httpx.HTTPStatusError: If n8n does not answer with HTTP 200
+        """
+        key = normalize_url(url)
+        data = await self._get_cached(key)
+        if data is not None:
+            yield msgspec.json.encode(data)
+            return
+        
+        chunks = []
+        async with self.admission:
+            async with self.client.stream(
+                "POST",
+                self.webhook_url,
+                json={"url": url}
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    raise httpx.HTTPStatusError(
+                        f"HTTP {response.status_code}: {response.text}",
+                        request=response.request,
+                        response=response
+                    )
+                
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    yield chunk
+        
+        # Runs before the stream ends, like the bulk path: cache the result
+        # and drop listings that predate the new row
+        body = b"".join(chunks)
+        try:
+            await self._set_cached(key, _decode_result(body), body)
+        except msgspec.DecodeError as e:
+            print(f"Error decoding streamed analysis for {key}: {e}")
+        await self._invalidate_analyses()
     
     async def analyze_bulk_urls(self, urls: List[str]) -> Dict[str, Any]:
         """
-        Analyze multiple URLs sequentially
+        Analyze multiple URLs concurrently
         
         Args:
             urls: List of URLs to analyze
@@ -68,22 +273,68 @@ class AnalysisService:
         Returns:
             Bulk analysis results
         """
+        # Analyze each distinct URL once, then map back to the input order
+        unique_urls = list(dict.fromkeys(urls))
+        unique_results = await asyncio.gather(
+            *[self._analyze_url(url) for url in unique_urls]
+        )
+        if any(result.get('cached') is False for result in unique_results):
+            await self._invalidate_analyses()
+        by_url = dict(zip(unique_urls, unique_results))
+        seen = set()
         results = []
-        successful = 0
-        failed = 0
-        
         for url in urls:
-            result = await self.analyze_single_url(url)
+            result = by_url[url]
+            if url in seen:
+                result = _as_repeat(result)
+            seen.add(url)
             results.append(result)
-            
-            if result['status'] == 'success':
-                successful += 1
-            else:
-                failed += 1
+        successful = sum(1 for result in results if result['status'] == 'success')
         
         return {
             'total_urls': len(urls),
             'successful': successful,
-            'failed': failed,
+            'failed': len(results) - successful,
             'results': results
-        }
\ No newline at end of file
+        }
+    
+    async def iter_bulk_urls(
+        self, 
+        urls: List[str]
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Analyze multiple URLs concurrently, yielding each result as it completes
+        
+        Args:
+            urls: List of URLs to analyze
+            
+        Yields:
+            (input index, analysis result) pairs in completion order
+        """
+        # Analyze each distinct URL once, then fan out to its input positions
+        positions: Dict[str, List[int]] = {}
+        for index, url in enumerate(urls):
+            positions.setdefault(url, []).append(index)
+        
+        async def analyze(url: str):
+            return url, await self._analyze_url(url)
+        
+        tasks = [asyncio.ensure_future(analyze(url)) for url in positions]
+        fresh = False
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                url, result = await next_done
+                fresh = fresh or result.get('cached') is False
+                first, *repeats = positions[url]
+                yield first, result
+                for index in repeats:
+                    yield index, _as_repeat(result)
+            
+            # Runs before the stream ends, so clients refetching after EOF
+            # never see the pre-batch listing
+            if fresh:
+                await self._invalidate_analyses()
+        finally:
+            # Stop outstanding calls if the client goes away mid-stream
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,126 @@
+# Path: backend/cache.py
+
+"""
+Redis cache helpers for Supabase queries and URL analyses
+"""
+import orjson
+import redis
+import redis.asyncio
+from typing import Any, Callable, Optional
+from functools import lru_cache, wraps
+from backend.config import settings
+
+
+# Last good values are kept this long to serve when Supabase fails
+STALE_TTL = 24 * 60 * 60
+
+# Generation counter for analysis listings; bumping it retires every
+# cached listing at once while their "stale:" fallbacks stay in place
+ANALYSES_GENERATION_KEY = "analyses:generation"
+
+
+@lru_cache()
+def get_redis() -> Optional[redis.Redis]:
+    """Get cached Redis client, or None when caching is disabled"""
+    if not settings.redis_url:
+        return None
+    return redis.Redis.from_url(settings.redis_url)
+
+
+@lru_cache()
+def get_async_redis() -> Optional[redis.asyncio.Redis]:
+    """Get cached asyncio Redis client, or None when caching is disabled"""
+    if not settings.redis_url:
+        return None
+    return redis.asyncio.Redis.from_url(settings.redis_url)
+
+
+def _get(client: redis.Redis, key: str) -> Optional[Any]:
+    """Read and decode a cached value, treating Redis errors as a miss"""
+    try:
+        blob = client.get(key)
+    except redis.RedisError as e:
+        print(f"Error reading cache key {key}: {e}")
+        return None
+    return orjson.loads(blob) if blob is not None else None
+
+
+def _set(client: redis.Redis, key: str, stale_key: str, ttl: int, value: Any):
+    """Store a value under its fresh key and its stale fallback key"""
+    blob = orjson.dumps(value)
+    try:
+        pipe = client.pipeline()
+        pipe.setex(key, ttl, blob)
+        pipe.setex(stale_key, STALE_TTL, blob)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Error writing cache key {key}: {e}")
+
+
+def _generation(client: redis.Redis, key: str) -> int:
+    """Read a generation counter, treating a missing key as 0"""
+    try:
+        blob = client.get(key)
+    except redis.RedisError as e:
+        print(f"Error reading cache generation {key}: {e}")
+        return 0
+    return int(blob) if blob is not None else 0
+
+
+async def bump_generation(client: redis.asyncio.Redis, key: str):
+    """Advance a generation counter, treating Redis errors as a no-op"""
+    try:
+        await client.incr(key)
+    except redis.RedisError as e:
+        print(f"Error bumping cache generation {key}: {e}")
+
+
+def cached(
+    ttl: int, 
+    key_fn: Callable[..., str], 
+    generation_key: Optional[str] = None
+):
+    """
+    Cache a service method's JSON-serializable result in Redis
+    
+    Args:
+        ttl: Seconds before a cached value is refetched
+        key_fn: Builds the cache key from the method arguments
+        generation_key: Optional counter whose value is part of the cache
+            key, so bumping it invalidates every entry in O(1). A result
+            computed before a bump is stored under the old generation and
+            is never served after it
+        
+    Returns:
+        Decorator for the method. When the wrapped call raises, the last
+        stale value for the same key is returned if one exists.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args):
+            client = get_redis()
+            if client is None:
+                return func(self, *args)
+            
+            base_key = key_fn(*args)
+            stale_key = f"stale:{base_key}"
+            key = base_key
+            if generation_key:
+                key = f"{base_key}:g{_generation(client, generation_key)}"
+            
+            value = _get(client, key)
+            if value is not None:
+                return value
+            
+            try:
+                value = func(self, *args)
+            except Exception:
+                stale = _get(client, stale_key)
+                if stale is None:
+                    raise
+                return stale
+            
+            _set(client, key, stale_key, ttl, value)
+            return value
+        return wrapper
+    return decorator
\ No newline at end of file
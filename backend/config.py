@@ -5,6 +5,7 @@ Configuration module for loading environment variables
 """
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -16,6 +17,17 @@ class Settings(BaseSettings):
     
     # N8N
     n8n_webhook_url: str
+    n8n_max_concurrency: int = 16
+    
+    # Admin endpoints (disabled when unset)
+    admin_token: Optional[str] = None
+    
+    # URL analysis result cache
+    url_cache_ttl: int = 300
+    url_cache_maxsize: int = 10000
+    
+    # Redis (query cache is disabled when unset)
+    redis_url: Optional[str] = None
     
     # Backend
     backend_host: str = "0.0.0.0"
@@ -29,4 +41,8 @@ class Settings(BaseSettings):
 @lru_cache()
 def get_settings() -> Settings:
     """Get cached settings instance"""
-    return Settings()
\ No newline at end of file
+    return Settings()
+
+
+# Resolved once at import; services read this instead of calling get_settings()
+settings = get_settings()
\ No newline at end of file
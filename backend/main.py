@@ -3,24 +3,66 @@
 """
 FastAPI main application
 """
-from fastapi import FastAPI, HTTPException, Query
+import asyncio
+import secrets
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime, timedelta, time
 from typing import Optional
+import httpx
+import msgspec
 
 from backend.models import (
     URLAnalysisRequest,
     BulkURLAnalysisRequest,
+    ConcurrencyUpdateRequest,
     BulkAnalysisResponse,
     StatisticsResponse
 )
+from backend.config import settings
 from backend.supabase_service import SupabaseService
 from backend.analysis_service import AnalysisService
 
+class MsgspecJSONResponse(JSONResponse):
+    """JSON response encoded with msgspec (handles AnalysisResult structs)"""
+    
+    def render(self, content) -> bytes:
+        return msgspec.json.encode(content)
+
+
+# Shared encoder for NDJSON streaming lines
+_ndjson_encoder = msgspec.json.Encoder()
+
+# Upper bound used to make end_date filters include the whole day
+_END_OF_DAY = time(23, 59, 59)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources on startup and release them on shutdown"""
+    # HTTP/2 multiplexes bulk fan-out over a few keep-alive connections
+    app.state.http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        limits=httpx.Limits(
+            max_keepalive_connections=32,
+            max_connections=100,
+            keepalive_expiry=30.0
+        ),
+        http2=True
+    )
+    app.state.analysis_service = AnalysisService(app.state.http_client)
+    yield
+    await app.state.http_client.aclose()
+
+
 app = FastAPI(
     title="Phishing URL Analytics API",
     description="API for analyzing URLs and getting phishing statistics",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=MsgspecJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -33,8 +75,24 @@ app.add_middleware(
 )
 
 # Services
+# SupabaseService is synchronous; routes call it via asyncio.to_thread so
+# database round-trips don't block the event loop
 supabase_service = SupabaseService()
-analysis_service = AnalysisService()
+
+
+def get_analysis_service(request: Request) -> AnalysisService:
+    """Get the analysis service bound to the shared HTTP client"""
+    return request.app.state.analysis_service
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Reject admin requests without the configured X-Admin-Token"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if not x_admin_token or not secrets.compare_digest(
+        x_admin_token.encode(), settings.admin_token.encode()
+    ):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
 
 
 @app.get("/")
@@ -45,15 +103,21 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "analyze": "/api/analyze",
+            "analyze_stream": "/api/analyze/stream",
             "bulk_analyze": "/api/analyze/bulk",
+            "bulk_analyze_stream": "/api/analyze/bulk/stream",
             "statistics": "/api/statistics",
-            "analyses": "/api/analyses"
+            "analyses": "/api/analyses",
+            "concurrency": "/api/admin/concurrency"
         }
     }
 
 
-@app.post("/api/analyze")
-async def analyze_url(request: URLAnalysisRequest):
+@app.post("/api/analyze", response_class=MsgspecJSONResponse)
+async def analyze_url(
+    request: URLAnalysisRequest,
+    analysis_service: AnalysisService = Depends(get_analysis_service)
+):
     """
     Analyze a single URL
     
@@ -69,15 +133,61 @@ async def analyze_url(request: URLAnalysisRequest):
         if result['status'] == 'error':
             raise HTTPException(status_code=500, detail=result['error'])
         
-        return result
+        return MsgspecJSONResponse(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/analyze/stream")
+async def analyze_url_stream(
+    request: URLAnalysisRequest,
+    analysis_service: AnalysisService = Depends(get_analysis_service)
+):
+    """
+    Analyze a single URL, streaming n8n's response as it arrives
+    
+    Args:
+        request: URL analysis request
+        
+    Returns:
+        Streaming JSON response proxied from n8n
+    """
+    chunks = analysis_service.stream_single_url(str(request.url))
+    
+    # Wait for the first chunk so upstream errors still map to HTTP 500
+    try:
+        first_chunk = await chunks.__anext__()
+    except StopAsyncIteration:
+        first_chunk = b""
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    async def body():
+        # Close the upstream stream (and its admission slot) right away if
+        # the client disconnects, instead of waiting for GC
+        try:
+            yield first_chunk
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+    
+    return StreamingResponse(body(), media_type="application/json")
 
 
-@app.post("/api/analyze/bulk", response_model=BulkAnalysisResponse)
-async def analyze_bulk_urls(request: BulkURLAnalysisRequest):
+# Results are already well-formed; the model only documents the schema
+# and is not used to revalidate the outbound payload
+@app.post(
+    "/api/analyze/bulk",
+    response_class=MsgspecJSONResponse,
+    responses={200: {"model": BulkAnalysisResponse}}
+)
+async def analyze_bulk_urls(
+    request: BulkURLAnalysisRequest,
+    analysis_service: AnalysisService = Depends(get_analysis_service)
+):
     """
-    Analyze multiple URLs sequentially
+    Analyze multiple URLs concurrently
     
     Args:
         request: Bulk URL analysis request
@@ -87,11 +197,32 @@ async def analyze_bulk_urls(request: BulkURLAnalysisRequest):
     """
     try:
         result = await analysis_service.analyze_bulk_urls(request.urls)
-        return result
+        return MsgspecJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/analyze/bulk/stream")
+async def analyze_bulk_urls_stream(
+    request: BulkURLAnalysisRequest,
+    analysis_service: AnalysisService = Depends(get_analysis_service)
+):
+    """
+    Analyze multiple URLs concurrently, streaming results as they complete
+    
+    Args:
+        request: Bulk URL analysis request
+        
+    Returns:
+        NDJSON stream with one {"index": ..., **result} line per input URL
+    """
+    async def body():
+        async for index, result in analysis_service.iter_bulk_urls(request.urls):
+            yield _ndjson_encoder.encode({'index': index, **result}) + b"\n"
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
 @app.get("/api/statistics")
 async def get_statistics(
     start_date: Optional[str] = Query(None, description="Start date (ISO format)"),
@@ -104,18 +235,11 @@ async def get_statistics(
         
         # Ajustar end_date para incluir todo el día
         if end:
-            from datetime import time
-            end = datetime.combine(end.date(), time(23, 59, 59))
+            end = datetime.combine(end.date(), _END_OF_DAY)
         
-        stats = supabase_service.get_statistics(start, end)
-        confidence_dist = supabase_service.get_confidence_distribution(start, end)
-        sources_usage = supabase_service.get_sources_usage(start, end)
-        
-        return {
-            **stats,
-            'confidence_distribution': confidence_dist,
-            'sources_usage': sources_usage
-        }
+        return await asyncio.to_thread(
+            supabase_service.get_full_statistics, start, end
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {e}")
     except Exception as e:
@@ -134,12 +258,13 @@ async def get_analyses(
             end = datetime.fromisoformat(end_date)
             
             # Ajustar end_date para incluir todo el día
-            from datetime import time
-            end = datetime.combine(end.date(), time(23, 59, 59))
+            end = datetime.combine(end.date(), _END_OF_DAY)
             
-            data = supabase_service.get_analyses_by_date_range(start, end)
+            data = await asyncio.to_thread(
+                supabase_service.get_analyses_by_date_range, start, end
+            )
         else:
-            data = supabase_service.get_all_analyses()
+            data = await asyncio.to_thread(supabase_service.get_all_analyses)
         
         return {
             'total': len(data),
@@ -162,10 +287,11 @@ async def get_daily_counts(
         end = datetime.fromisoformat(end_date)
         
         # Ajustar end_date para incluir todo el día
-        from datetime import time
-        end = datetime.combine(end.date(), time(23, 59, 59))
+        end = datetime.combine(end.date(), _END_OF_DAY)
         
-        daily_counts = supabase_service.get_daily_analysis_count(start, end)
+        daily_counts = await asyncio.to_thread(
+            supabase_service.get_daily_analysis_count, start, end
+        )
         
         return {
             'data': daily_counts
@@ -175,6 +301,40 @@ async def get_daily_counts(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@app.get("/api/admin/concurrency", dependencies=[Depends(require_admin_token)])
+async def get_concurrency(
+    analysis_service: AnalysisService = Depends(get_analysis_service)
+):
+    """Get the n8n concurrency limit and the number of in-flight calls"""
+    return {
+        'limit': analysis_service.admission.limit,
+        'active': analysis_service.admission.active
+    }
+
+
+@app.put("/api/admin/concurrency", dependencies=[Depends(require_admin_token)])
+async def set_concurrency(
+    request: ConcurrencyUpdateRequest,
+    analysis_service: AnalysisService = Depends(get_analysis_service)
+):
+    """
+    Resize the n8n concurrency limit without restarting
+    
+    Args:
+        request: New concurrency limit
+        
+    Returns:
+        Updated limit and in-flight calls
+    """
+    await analysis_service.admission.resize(request.limit)
+    
+    return {
+        'limit': analysis_service.admission.limit,
+        'active': analysis_service.admission.active
+    }
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -183,9 +343,9 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    from backend.config import get_settings
     
-    settings = get_settings()
+    # loop/http default to "auto": uvloop and httptools (from
+    # uvicorn[standard]) are used where installed, asyncio/h11 elsewhere
     uvicorn.run(
         "backend.main:app",
         host=settings.backend_host,
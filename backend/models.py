@@ -3,35 +3,80 @@
 """
 Pydantic models for request/response validation
 """
-from pydantic import BaseModel, HttpUrl, Field
-from typing import List, Optional, Dict, Any
+import msgspec
+from pydantic import BaseModel, Field, ConfigDict, AfterValidator
+from typing import List, Optional, Dict, Any, Annotated, Union
 from datetime import datetime
 
 
+# Keep models on pydantic-core's fast path (no revalidation or extra hooks)
+MODEL_CONFIG = ConfigDict(
+    str_strip_whitespace=False,
+    validate_assignment=False,
+    revalidate_instances='never',
+    arbitrary_types_allowed=False
+)
+
+MAX_URL_LENGTH = 2048
+
+
+def _fast_url_check(url: str) -> str:
+    """Cheap URL check used instead of full HttpUrl parsing"""
+    if not url.startswith(('http://', 'https://')):
+        raise ValueError("URL must start with http:// or https://")
+    if len(url) > MAX_URL_LENGTH:
+        raise ValueError(f"URL must be at most {MAX_URL_LENGTH} characters")
+    return url
+
+
+FastUrl = Annotated[str, AfterValidator(_fast_url_check)]
+
+
 class URLAnalysisRequest(BaseModel):
     """Single URL analysis request"""
-    url: HttpUrl
+    model_config = MODEL_CONFIG
+    
+    url: FastUrl
     url_id: Optional[str] = None
 
 
 class BulkURLAnalysisRequest(BaseModel):
     """Bulk URL analysis request"""
-    urls: List[str] = Field(..., min_items=1, max_items=100)
+    model_config = MODEL_CONFIG
+    
+    urls: List[str] = Field(..., min_length=1, max_length=100)
+
 
+class ConcurrencyUpdateRequest(BaseModel):
+    """Runtime change of the n8n concurrency limit"""
+    model_config = MODEL_CONFIG
+    
+    limit: int = Field(..., ge=1, le=1000)
 
-class AnalysisResult(BaseModel):
-    """Analysis result from n8n workflow"""
-    url: str
+
+class AnalysisResult(msgspec.Struct):
+    """Analysis result from n8n workflow (decoded directly by msgspec)"""
+    # Mirrors the analysis_results row returned by the workflow;
+    # unknown fields are ignored on decode
     is_phishing: bool
     risk_score: int
     confidence_level: str
-    analysis_date: str
-    sources_checked: str
+    analysis_date: Optional[str] = None
+    sources_checked: Union[List[str], str, None] = None
+    url: Optional[str] = None
+    url_id: Optional[str] = None
+    virustotal_result: Any = None
+    heuristic_result: Any = None
+    analysis_duration_ms: Optional[int] = None
     error_log: Optional[str] = None
+    id: Optional[str] = None
+    created_at: Optional[str] = None
 
 
 class BulkAnalysisResponse(BaseModel):
     """Response for bulk analysis"""
+    model_config = MODEL_CONFIG
+    
     total_urls: int
     successful: int
     failed: int
@@ -40,6 +85,8 @@ class BulkAnalysisResponse(BaseModel):
 
 class StatisticsResponse(BaseModel):
     """Statistics response"""
+    model_config = MODEL_CONFIG
+    
     total_analyses: int
     phishing_detected: int
     safe_urls: int
@@ -49,5 +96,7 @@ class StatisticsResponse(BaseModel):
 
 class DateRangeRequest(BaseModel):
     """Date range filter request"""
+    model_config = MODEL_CONFIG
+    
     start_date: datetime
     end_date: datetime
\ No newline at end of file
@@ -3,21 +3,34 @@
 """
 Supabase service for database operations
 """
+import re
+import numpy as np
+from collections import Counter
 from supabase import create_client, Client
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from backend.config import get_settings
+from backend.config import settings
+from backend.cache import cached, ANALYSES_GENERATION_KEY
+
+
+# Risk score (0-100) -> bucket index: 0=low (<40), 1=medium (40-69), 2=high (>=70)
+_RISK_LUT = np.frombuffer(bytes([0] * 40 + [1] * 30 + [2] * 31), dtype=np.uint8)
+
+# Splits comma-separated sources_checked strings, trimming around commas
+_split_sources = re.compile(r'\s*,\s*').split
 
 
 class SupabaseService:
     """Service for interacting with Supabase database"""
     
     def __init__(self):
-        settings = get_settings()
         self.client: Client = create_client(
             settings.supabase_url,
             settings.supabase_key
         )
+        # Table builders are reusable: each select() starts a fresh query
+        self._analysis_results = self.client.table('analysis_results')
+        self._daily_analysis_counts = self.client.table('daily_analysis_counts')
     
     def get_analyses_by_date_range(
         self, 
@@ -35,15 +48,7 @@ class SupabaseService:
             List of analysis results
         """
         try:
-            response = self.client.table('analysis_results').select(
-                '*'
-            ).gte(
-                'analysis_date', start_date.isoformat()
-            ).lte(
-                'analysis_date', end_date.isoformat()
-            ).order('analysis_date', desc=True).execute()
-            
-            return response.data if response.data else []
+            return self._fetch_analyses_by_date_range(start_date, end_date)
         except Exception as e:
             print(f"Error fetching analyses: {e}")
             return []
@@ -51,66 +56,86 @@ class SupabaseService:
     def get_all_analyses(self) -> List[Dict[str, Any]]:
         """Get all analysis results"""
         try:
-            response = self.client.table('analysis_results').select(
-                '*'
-            ).order('analysis_date', desc=True).execute()
-            
-            return response.data if response.data else []
+            return self._fetch_all_analyses()
         except Exception as e:
             print(f"Error fetching all analyses: {e}")
             return []
     
-    def get_statistics(
+    @cached(
+        ttl=60,
+        key_fn=lambda start, end: f"analyses:{start.isoformat()}:{end.isoformat()}",
+        generation_key=ANALYSES_GENERATION_KEY
+    )
+    def _fetch_analyses_by_date_range(
+        self, 
+        start_date: datetime, 
+        end_date: datetime
+    ) -> List[Dict[str, Any]]:
+        """Query analysis results within a date range from Supabase"""
+        response = self._analysis_results.select(
+            '*'
+        ).gte(
+            'analysis_date', start_date.isoformat()
+        ).lte(
+            'analysis_date', end_date.isoformat()
+        ).order('analysis_date', desc=True).execute()
+        
+        return response.data if response.data else []
+    
+    @cached(
+        ttl=60, 
+        key_fn=lambda: "analyses:all", 
+        generation_key=ANALYSES_GENERATION_KEY
+    )
+    def _fetch_all_analyses(self) -> List[Dict[str, Any]]:
+        """Query all analysis results from Supabase"""
+        response = self._analysis_results.select(
+            '*'
+        ).order('analysis_date', desc=True).execute()
+        
+        return response.data if response.data else []
+    
+    def _rpc(
         self, 
+        function: str, 
         start_date: Optional[datetime] = None, 
         end_date: Optional[datetime] = None
-    ) -> Dict[str, Any]:
+    ) -> Any:
         """
-        Get statistics for analyses
+        Call an aggregation function defined in schema.sql
         
         Args:
+            function: Postgres function name
             start_date: Optional start date for filtering
             end_date: Optional end date for filtering
             
         Returns:
-            Dictionary with statistics
+            JSON value returned by the function
         """
+        params = {'p_start': None, 'p_end': None}
         if start_date and end_date:
-            data = self.get_analyses_by_date_range(start_date, end_date)
-        else:
-            data = self.get_all_analyses()
-        
-        if not data:
-            return {
-                'total_analyses': 0,
-                'phishing_detected': 0,
-                'safe_urls': 0,
-                'avg_risk_score': 0.0,
-                'phishing_percentage': 0.0,
-                'risk_distribution': {
-                    'low': 0,
-                    'medium': 0,
-                    'high': 0
-                }
+            params = {
+                'p_start': start_date.isoformat(),
+                'p_end': end_date.isoformat()
             }
         
-        total = len(data)
-        phishing = sum(1 for item in data if item.get('is_phishing', False))
-        safe = total - phishing
-        
-        risk_scores = [item.get('risk_score', 0) for item in data]
-        avg_risk = sum(risk_scores) / total if total > 0 else 0.0
-        
-        # Risk distribution
-        low_risk = sum(1 for score in risk_scores if score < 40)
-        medium_risk = sum(1 for score in risk_scores if 40 <= score < 70)
-        high_risk = sum(1 for score in risk_scores if score >= 70)
-        
+        return self.client.rpc(function, params).execute().data
+    
+    @staticmethod
+    def _format_statistics(
+        total: int, 
+        phishing: int, 
+        avg_risk: float, 
+        low_risk: int, 
+        medium_risk: int, 
+        high_risk: int
+    ) -> Dict[str, Any]:
+        """Build the statistics response from aggregated counts"""
         return {
             'total_analyses': total,
             'phishing_detected': phishing,
-            'safe_urls': safe,
-            'avg_risk_score': round(avg_risk, 2),
+            'safe_urls': total - phishing,
+            'avg_risk_score': round(float(avg_risk), 2),
             'phishing_percentage': round((phishing / total * 100), 2) if total > 0 else 0.0,
             'risk_distribution': {
                 'low': low_risk,
@@ -119,56 +144,108 @@ class SupabaseService:
             }
         }
     
-    def get_confidence_distribution(
+    def _fetch_statistics_rows(
         self, 
         start_date: Optional[datetime] = None, 
         end_date: Optional[datetime] = None
-    ) -> Dict[str, int]:
-        """Get distribution of confidence levels"""
-        if start_date and end_date:
-            data = self.get_analyses_by_date_range(start_date, end_date)
-        else:
-            data = self.get_all_analyses()
-        
-        if not data:
-            return {'low': 0, 'medium': 0, 'high': 0}
-        
-        distribution = {'low': 0, 'medium': 0, 'high': 0}
-        for item in data:
-            confidence = item.get('confidence_level', 'low')
-            if confidence in distribution:
-                distribution[confidence] += 1
-        
-        return distribution
+    ) -> List[Dict[str, Any]]:
+        """Fetch only the columns needed for client-side statistics"""
+        try:
+            query = self._analysis_results.select(
+                'is_phishing, risk_score, confidence_level, sources_checked'
+            )
+            if start_date and end_date:
+                query = query.gte(
+                    'analysis_date', start_date.isoformat()
+                ).lte(
+                    'analysis_date', end_date.isoformat()
+                )
+            response = query.execute()
+            
+            return response.data if response.data else []
+        except Exception as e:
+            print(f"Error fetching statistics rows: {e}")
+            return []
     
-    def get_sources_usage(
+    def get_full_statistics(
         self, 
         start_date: Optional[datetime] = None, 
         end_date: Optional[datetime] = None
-    ) -> Dict[str, int]:
-        """Get usage statistics of different analysis sources"""
-        if start_date and end_date:
-            data = self.get_analyses_by_date_range(start_date, end_date)
-        else:
-            data = self.get_all_analyses()
+    ) -> Dict[str, Any]:
+        """
+        Get statistics, confidence distribution and sources usage
+        in a single round-trip
         
-        if not data:
-            return {}
+        Args:
+            start_date: Optional start date for filtering
+            end_date: Optional end date for filtering
+            
+        Returns:
+            Dictionary with statistics, confidence_distribution and
+            sources_usage
+        """
+        try:
+            result = self._rpc('get_full_stats', start_date, end_date)
+            row = result['stats']
+            return {
+                **self._format_statistics(
+                    row['total'], row['phishing'], row['avg_risk'],
+                    row['low'], row['medium'], row['high']
+                ),
+                'confidence_distribution': {
+                    'low': 0, 'medium': 0, 'high': 0,
+                    **(result['confidence_distribution'] or {})
+                },
+                'sources_usage': result['sources_usage'] or {}
+            }
+        except Exception as e:
+            # Aggregate client-side if the schema.sql functions are missing
+            print(f"Error fetching statistics via RPC: {e}")
+        
+        data = self._fetch_statistics_rows(start_date, end_date)
+        
+        total = len(data)
+        
+        # Vectorized risk/phishing aggregates over contiguous arrays
+        scores = np.fromiter(
+            (item.get('risk_score', 0) for item in data),
+            dtype=np.int32,
+            count=total
+        )
+        is_phishing = np.fromiter(
+            (bool(item.get('is_phishing', False)) for item in data),
+            dtype=np.bool_,
+            count=total
+        )
+        phishing = int(is_phishing.sum())
+        avg_risk = float(scores.mean()) if total > 0 else 0.0
+        low_risk, medium_risk, high_risk = (
+            int(count)
+            for count in np.bincount(_RISK_LUT.take(scores, mode='clip'), minlength=3)
+        )
+        
+        confidence_distribution = {'low': 0, 'medium': 0, 'high': 0}
+        sources_count = Counter()
         
-        sources_count = {}
         for item in data:
+            confidence = item.get('confidence_level', 'low')
+            if confidence in confidence_distribution:
+                confidence_distribution[confidence] += 1
+            
             sources = item.get('sources_checked', '')
             if sources:
                 # Parse sources (handle both string and array formats)
                 if isinstance(sources, str):
-                    source_list = [s.strip() for s in sources.split(',')]
-                else:
-                    source_list = sources
-                
-                for source in source_list:
-                    sources_count[source] = sources_count.get(source, 0) + 1
-        
-        return sources_count
+                    sources = _split_sources(sources.strip())
+                sources_count.update(sources)
+        
+        return {
+            **self._format_statistics(
+                total, phishing, avg_risk, low_risk, medium_risk, high_risk
+            ),
+            'confidence_distribution': confidence_distribution,
+            'sources_usage': dict(sources_count)
+        }
     
     def get_daily_analysis_count(
         self, 
@@ -176,23 +253,33 @@ class SupabaseService:
         end_date: datetime
     ) -> List[Dict[str, Any]]:
         """Get daily count of analyses"""
+        try:
+            response = self._daily_analysis_counts.select(
+                'date:day, count:total'
+            ).gte(
+                'day', start_date.date().isoformat()
+            ).lte(
+                'day', end_date.date().isoformat()
+            ).order('day').execute()
+            
+            return response.data if response.data else []
+        except Exception as e:
+            # Group client-side if the daily counts view is missing
+            print(f"Error fetching daily counts view: {e}")
+        
         data = self.get_analyses_by_date_range(start_date, end_date)
         
         if not data:
             return []
         
-        # Group by date
-        daily_counts = {}
-        for item in data:
-            date_str = item.get('analysis_date', '')
-            if date_str:
-                date_only = date_str.split('T')[0]
-                daily_counts[date_only] = daily_counts.get(date_only, 0) + 1
+        # Group by date (ISO 8601 timestamps start with YYYY-MM-DD)
+        daily_counts = Counter(
+            item['analysis_date'][:10]
+            for item in data
+            if item.get('analysis_date')
+        )
         
-        # Convert to list
-        result = [
+        return [
             {'date': date, 'count': count} 
             for date, count in sorted(daily_counts.items())
-        ]
-        
-        return result
\ No newline at end of file
+        ]
\ No newline at end of file
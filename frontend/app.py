@@ -4,14 +4,21 @@
 Streamlit Frontend Application
 """
 import streamlit as st
-import requests
+import httpx
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
+import numpy as np
+import plotly.io as pio
 from datetime import datetime, timedelta
+from typing import Optional
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 import os
 import sys
-import tempfile
+import threading
 import time
+import zipfile
 
 # Add project root to Python path
 import pathlib
@@ -23,6 +30,7 @@ if str(project_root) not in sys.path:
 try:
     from utils.chart_generator import ChartGenerator
     from utils.pdf_generator import PDFReportGenerator
+    from utils.image_export import figure_to_image
 except ModuleNotFoundError as e:
     st.error(f"Error importing modules: {e}")
     st.error(f"Python path: {sys.path}")
@@ -43,6 +51,63 @@ API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 # Initialize chart generator
 chart_gen = ChartGenerator()
 
+# Chart downloads: WebP is smaller and faster to encode than PNG
+CHART_EXPORT_FORMAT = "webp"
+CHART_EXPORT_WIDTH = 700
+CHART_EXPORT_HEIGHT = 400
+
+# PDF charts: "matplotlib" draws them from the statistics (no Chrome needed);
+# "plotly" exports the dashboard figures through Kaleido so they match the page
+PDF_CHART_RENDERER = "matplotlib"
+
+# Bulk analysis result cards: (border color, emoji, verdict) by is_phishing
+_VERDICT_STYLES = {
+    True: ("#e74c3c", "⚠️", "PHISHING DETECTADO"),
+    False: ("#2ecc71", "✅", "URL SEGURA")
+}
+
+_CARD_STYLE = (
+    "border-left: 5px solid {color}; padding: 15px; margin: 10px 0; "
+    "background-color: rgba(255,255,255,0.05); border-radius: 5px;"
+)
+
+_RESULT_CARD = (
+    '<div style="' + _CARD_STYLE + '">'
+    '<h4 style="margin:0; color:{color};">{emoji} Análisis #{idx}: {verdict}</h4>'
+    '<p style="margin:5px 0; font-size:14px; color:gray;"><strong>URL:</strong> {url}</p>'
+    '</div>'
+)
+
+_ERROR_CARD = (
+    '<div style="' + _CARD_STYLE.format(color="#95a5a6") + '">'
+    '<h4 style="margin:0; color:#95a5a6;">❌ Análisis #{idx}: ERROR</h4>'
+    '<p style="margin:5px 0; font-size:14px; color:gray;"><strong>URL:</strong> {url}</p>'
+    '<p style="margin:5px 0; font-size:13px; color:#e74c3c;"><strong>Error:</strong> {error}</p>'
+    '</div>'
+)
+
+
+@st.cache_resource
+def get_http_client() -> httpx.Client:
+    """Shared HTTP client; HTTP/2 multiplexes concurrent API calls"""
+    return httpx.Client(
+        base_url=API_BASE_URL,
+        timeout=10.0,
+        transport=httpx.HTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_keepalive_connections=8, max_connections=8)
+        )
+    )
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _get_json(path: str, params: dict):
+    """GET an API endpoint; failed requests raise and are not cached"""
+    response = get_http_client().get(path, params=params)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
 
 def fetch_statistics(start_date: str = None, end_date: str = None):
     """Fetch statistics from API"""
@@ -53,10 +118,8 @@ def fetch_statistics(start_date: str = None, end_date: str = None):
         params['end_date'] = end_date
     
     try:
-        response = requests.get(f"{API_BASE_URL}/api/statistics", params=params, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return _get_json("/api/statistics", params)
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
         st.error(f"Error fetching statistics: {e}")
         return None
 
@@ -70,10 +133,8 @@ def fetch_analyses(start_date: str = None, end_date: str = None):
         params['end_date'] = end_date
     
     try:
-        response = requests.get(f"{API_BASE_URL}/api/analyses", params=params, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return _get_json("/api/analyses", params)
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
         st.error(f"Error fetching analyses: {e}")
         return None
 
@@ -86,31 +147,251 @@ def fetch_daily_counts(start_date: str, end_date: str):
     }
     
     try:
-        response = requests.get(f"{API_BASE_URL}/api/daily-counts", params=params, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return _get_json("/api/daily-counts", params)
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
         st.error(f"Error fetching daily counts: {e}")
         return None
 
 
-def analyze_bulk_urls(urls: list):
-    """Send bulk URLs for analysis"""
+@st.cache_data(max_entries=64, show_spinner=False)
+def build_chart(kind: str, data):
+    """Build a chart once per unique input and reuse it across reruns"""
+    return getattr(chart_gen, f"create_{kind}")(data)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def fig_to_image(fig_json: str) -> bytes:
+    """Export a chart image; Kaleido only runs for figures not seen before"""
+    return figure_to_image(
+        pio.from_json(fig_json),
+        format=CHART_EXPORT_FORMAT,
+        width=CHART_EXPORT_WIDTH,
+        height=CHART_EXPORT_HEIGHT
+    )
+
+
+def build_charts_zip(charts: dict) -> bytes:
+    """Bundle the given charts as image files in one ZIP archive"""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, fig in charts.items():
+            archive.writestr(
+                f"{name}.{CHART_EXPORT_FORMAT}", fig_to_image(fig.to_json())
+            )
+    return buffer.getvalue()
+
+
+@st.fragment
+def chart_downloads(charts: dict):
+    """Offer every chart as a single ZIP, exported only when requested"""
+    if st.button("💾 Descargar todos los gráficos", use_container_width=True):
+        with st.spinner("Exportando gráficos..."):
+            data = build_charts_zip(charts)
+        
+        st.download_button(
+            label="📥 Descargar ZIP",
+            data=data,
+            file_name="graficos_phishing.zip",
+            mime="application/zip",
+            use_container_width=True
+        )
+
+
+@st.cache_resource
+def get_pdf_executor() -> ThreadPoolExecutor:
+    """Single background worker that builds PDF reports off the script thread"""
+    return ThreadPoolExecutor(max_workers=1)
+
+
+@st.cache_resource
+def get_pdf_generator() -> PDFReportGenerator:
+    """Shared PDF generator so its chart export pool is created once"""
+    return PDFReportGenerator()
+
+
+def build_pdf_report(
+    pdf_gen: PDFReportGenerator, 
+    statistics: dict, 
+    charts: Optional[dict], 
+    date_range: dict
+) -> bytes:
+    """Generate the PDF report and return its contents"""
+    output = BytesIO()
+    
+    pdf_gen.generate_report(
+        statistics=statistics,
+        charts=charts,
+        date_range=date_range,
+        output=output,
+        renderer=PDF_CHART_RENDERER
+    )
+    
+    return output.getvalue()
+
+
+@st.fragment(run_every=0.5)
+def wait_for_pdf_report(future):
+    """Poll the background PDF job; only this fragment reruns meanwhile"""
+    if future.done():
+        st.rerun()
+    
+    st.info("⏳ Generando informe PDF...")
+
+
+@st.fragment
+def pdf_report_section(
+    statistics: dict, 
+    charts: Optional[dict], 
+    date_range: dict
+):
+    """Generate the PDF report in the background and poll until it is ready"""
+    if st.button("🔄 Generar Informe PDF", use_container_width=True):
+        # Resolve the cached generator here: the worker thread has no
+        # ScriptRunContext for st.cache_resource
+        st.session_state['pdf_report'] = (
+            get_pdf_executor().submit(
+                build_pdf_report, get_pdf_generator(), statistics, charts, date_range
+            ),
+            date_range
+        )
+    
+    if 'pdf_report' not in st.session_state:
+        return
+    
+    future, report_range = st.session_state['pdf_report']
+    
+    if not future.done():
+        wait_for_pdf_report(future)
+        return
+    
+    try:
+        pdf_bytes = future.result()
+    except Exception as e:
+        del st.session_state['pdf_report']
+        st.error(f"Error al generar el PDF: {e}")
+        return
+    
+    st.download_button(
+        label="📥 Descargar Informe PDF",
+        data=pdf_bytes,
+        file_name=f"informe_phishing_{report_range['start']}_a_{report_range['end']}.pdf",
+        mime="application/pdf",
+        use_container_width=True
+    )
+    
+    st.success("✅ ¡Informe PDF generado exitosamente!")
+
+
+def load_dashboard_data(start_date: str, end_date: str):
+    """Fetch statistics, analyses and daily counts concurrently"""
+    ctx = get_script_run_ctx()
+    
+    def run(fetch):
+        # Attach the script context so st.error works from worker threads
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fetch(start_date, end_date)
+    
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [
+            executor.submit(run, fetch)
+            for fetch in (fetch_statistics, fetch_analyses, fetch_daily_counts)
+        ]
+        return tuple(future.result() for future in futures)
+
+
+def wait_for_new_analyses(
+    start_date: str, 
+    end_date: str, 
+    expected_total: int, 
+    timeout: float = 3.0
+):
+    """Poll statistics until the expected analysis count is visible"""
+    deadline = time.monotonic() + timeout
+    while True:
+        statistics = fetch_statistics(start_date, end_date)
+        if (
+            not statistics
+            or statistics.get('total_analyses', 0) >= expected_total
+            or time.monotonic() >= deadline
+        ):
+            return
+        time.sleep(0.15)
+        _get_json.clear()
+
+
+def analyze_bulk_urls(urls: list, on_result=None):
+    """Send bulk URLs for analysis, receiving results as they complete"""
+    results = [None] * len(urls)
+    
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/api/analyze/bulk",
+        with get_http_client().stream(
+            "POST",
+            "/api/analyze/bulk/stream",
             json={"urls": urls},
-            timeout=300
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+            timeout=httpx.Timeout(300.0, connect=5.0)
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                item = orjson.loads(line)
+                index = item.pop('index')
+                results[index] = item
+                if on_result:
+                    on_result(index, item)
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
         st.error(f"Error analyzing URLs: {e}")
         return None
+    
+    # URLs without a result line (stream cut short) count as failures
+    results = [
+        item or {'url': url, 'status': 'error', 'error': 'Sin respuesta del servidor'}
+        for url, item in zip(urls, results)
+    ]
+    successful = sum(1 for item in results if item['status'] == 'success')
+    # Only fresh analyses add rows to Supabase; cache hits and repeats don't
+    analyzed = sum(
+        1 for item in results
+        if item['status'] == 'success' and not item.get('cached', False)
+    )
+    
+    return {
+        'total_urls': len(urls),
+        'successful': successful,
+        'failed': len(urls) - successful,
+        'analyzed': analyzed,
+        'results': results
+    }
+
+
+def render_result_card(idx: int, item: dict) -> str:
+    """Render the HTML card for one bulk analysis result"""
+    if item['status'] == 'success' and 'data' in item:
+        # Color según resultado
+        border_color, emoji, verdict = _VERDICT_STYLES[
+            bool(item['data'].get('is_phishing', False))
+        ]
+        return _RESULT_CARD.format(
+            color=border_color,
+            emoji=emoji,
+            idx=idx,
+            verdict=verdict,
+            url=item['url']
+        )
+    
+    if item['status'] == 'error':
+        return _ERROR_CARD.format(
+            idx=idx,
+            url=item['url'],
+            error=item.get('error', 'Error desconocido')
+        )
+    
+    return ""
 
 
+@st.fragment
 def display_analysis_results(result):
-    """Display analysis results in cards"""
+    """Display analysis results as one batch of cards plus a summary table"""
     st.markdown("---")
     st.subheader("🎯 Resultados del Análisis")
     
@@ -125,131 +406,90 @@ def display_analysis_results(result):
     
     st.markdown("---")
     
-    # Mostrar cada URL analizada
-    for idx, item in enumerate(result['results'], 1):
-        if item['status'] == 'success' and 'data' in item:
-            data = item['data']
-            url = item['url']
-            
-            # Determinar si es phishing
-            is_phishing = data.get('is_phishing', False)
-            risk_score = data.get('risk_score', 0)
-            confidence = data.get('confidence_level', 'unknown').upper()
-            
-            # Color según resultado
-            if is_phishing:
-                border_color = "#e74c3c"
-                emoji = "⚠️"
-                verdict = "PHISHING DETECTADO"
-            else:
-                border_color = "#2ecc71"
-                emoji = "✅"
-                verdict = "URL SEGURA"
-            
-            # Card de resultado
-            st.markdown(f"""
-            <div style="
-                border-left: 5px solid {border_color};
-                padding: 15px;
-                margin: 10px 0;
-                background-color: rgba(255,255,255,0.05);
-                border-radius: 5px;
-            ">
-                <h4 style="margin:0; color:{border_color};">
-                    {emoji} Análisis #{idx}: {verdict}
-                </h4>
-                <p style="margin:5px 0; font-size:14px; color:gray;">
-                    <strong>URL:</strong> {url}
-                </p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Métricas en columnas
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric(
-                    "🎯 Risk Score",
-                    f"{risk_score}/100",
-                    help="Score de riesgo (0=seguro, 100=muy peligroso)"
-                )
+    # Construir todas las cards en una sola pasada
+    st.markdown(
+        "".join(
+            render_result_card(idx, item)
+            for idx, item in enumerate(result['results'], 1)
+        ),
+        unsafe_allow_html=True
+    )
+    
+    # Métricas de todas las URLs en una sola tabla, calculadas por columnas
+    df = pd.json_normalize(result['results'], max_level=1).reindex(columns=[
+        'url', 'status', 'data.is_phishing', 'data.risk_score',
+        'data.confidence_level', 'data.sources_checked',
+        'data.analysis_duration_ms'
+    ])
+    sources = df['data.sources_checked'].astype(object)
+    table = pd.DataFrame({
+        '#': np.arange(1, len(df) + 1),
+        'URL': df['url'],
+        'Resultado': np.select(
+            [df['status'].eq('error'), df['data.is_phishing'].eq(True)],
+            ['ERROR', 'PHISHING DETECTADO'],
+            default='URL SEGURA'
+        ),
+        'Risk Score': df['data.risk_score'],
+        'Confidence': df['data.confidence_level'].astype(object).str.upper(),
+        # Comma-separated strings count separators; lists fall back to len()
+        'Fuentes': (
+            sources.str.count(',').add(1)
+            .fillna(sources.str.len())
+            .fillna(0)
+            .astype(int)
+        ),
+        'Tiempo (s)': df['data.analysis_duration_ms'].fillna(0) / 1000
+    })
+    
+    st.dataframe(
+        table,
+        column_config={
+            'Risk Score': st.column_config.ProgressColumn(
+                '🎯 Risk Score',
+                help="Score de riesgo (0=seguro, 100=muy peligroso)",
+                format="%d",
+                min_value=0,
+                max_value=100
+            ),
+            'Confidence': st.column_config.TextColumn(
+                '🔍 Confidence',
+                help="Nivel de confianza del análisis"
+            ),
+            'Fuentes': st.column_config.NumberColumn('📡 Fuentes'),
+            'Tiempo (s)': st.column_config.NumberColumn('⏱️ Tiempo', format="%.1fs")
+        },
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    # Detalles técnicos solo bajo demanda
+    if st.toggle("🔬 Ver todos los detalles técnicos"):
+        for idx, item in enumerate(result['results'], 1):
+            if item['status'] != 'success' or 'data' not in item:
+                continue
             
-            with col2:
-                st.metric(
-                    "🔍 Confidence",
-                    confidence,
-                    help="Nivel de confianza del análisis"
-                )
+            data = item['data']
+            st.markdown(f"**Análisis #{idx}:** {item['url']}")
+            col_a, col_b = st.columns(2)
             
-            with col3:
-                sources = data.get('sources_checked', 'N/A')
-                if isinstance(sources, str):
-                    source_count = len(sources.split(','))
+            with col_a:
+                st.markdown("**VirusTotal:**")
+                vt = data.get('virustotal_result')
+                if vt and isinstance(vt, dict):
+                    st.json(vt)
                 else:
-                    source_count = len(sources) if sources else 0
-                st.metric(
-                    "📡 Fuentes",
-                    source_count,
-                    help=f"Fuentes: {sources}"
-                )
-            
-            with col4:
-                duration = data.get('analysis_duration_ms', 0)
-                duration_sec = duration / 1000 if duration else 0
-                st.metric(
-                    "⏱️ Tiempo",
-                    f"{duration_sec:.1f}s",
-                    help="Tiempo de análisis"
-                )
-            
-            # Detalles expandibles
-            with st.expander("🔬 Ver Detalles Técnicos"):
-                col_a, col_b = st.columns(2)
-                
-                with col_a:
-                    st.markdown("**VirusTotal:**")
-                    vt = data.get('virustotal_result')
-                    if vt and isinstance(vt, dict):
-                        st.json(vt)
-                    else:
-                        st.text(vt if vt else "No disponible")
-                
-                with col_b:
-                    st.markdown("**Heurísticas:**")
-                    heur = data.get('heuristic_result')
-                    if heur and isinstance(heur, dict):
-                        st.json(heur)
-                    else:
-                        st.text(heur if heur else "No disponible")
-            
-            st.markdown("---")
-        
-        elif item['status'] == 'error':
-            # Card de error
-            url = item['url']
-            error = item.get('error', 'Error desconocido')
+                    st.text(vt if vt else "No disponible")
             
-            st.markdown(f"""
-            <div style="
-                border-left: 5px solid #95a5a6;
-                padding: 15px;
-                margin: 10px 0;
-                background-color: rgba(255,255,255,0.05);
-                border-radius: 5px;
-            ">
-                <h4 style="margin:0; color:#95a5a6;">
-                    ❌ Análisis #{idx}: ERROR
-                </h4>
-                <p style="margin:5px 0; font-size:14px; color:gray;">
-                    <strong>URL:</strong> {url}
-                </p>
-                <p style="margin:5px 0; font-size:13px; color:#e74c3c;">
-                    <strong>Error:</strong> {error}
-                </p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.markdown("---")
+            with col_b:
+                st.markdown("**Heurísticas:**")
+                heur = data.get('heuristic_result')
+                if heur and isinstance(heur, dict):
+                    st.json(heur)
+                else:
+                    st.text(heur if heur else "No disponible")
+    
+    st.markdown("---")
 
 
 def main():
@@ -259,40 +499,45 @@ def main():
     st.title("🔒 Panel de Análisis de URLs de Phishing")
     st.markdown("---")
     
+    # Fecha de referencia, calculada una sola vez por ejecución
+    today = datetime.now().date()
+    
     # Barra lateral
     with st.sidebar:
         st.header("⚙️ Configuración")
         
-        # Filtro por rango de fechas
-        st.subheader("Filtro por Rango de Fechas")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            start_date = st.date_input(
-                "Fecha de inicio",
-                value=datetime.now() - timedelta(days=30),
-                max_value=datetime.now()
-            )
-        with col2:
-            end_date = st.date_input(
-                "Fecha de fin",
-                value=datetime.now(),
-                max_value=datetime.now()
+        # Los widgets solo disparan un rerun al enviar el formulario
+        with st.form("filters", border=False):
+            # Filtro por rango de fechas
+            st.subheader("Filtro por Rango de Fechas")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                start_date = st.date_input(
+                    "Fecha de inicio",
+                    value=today - timedelta(days=30),
+                    max_value=today
+                )
+            with col2:
+                end_date = st.date_input(
+                    "Fecha de fin",
+                    value=today,
+                    max_value=today
+                )
+            
+            apply_filter = st.form_submit_button("📊 Aplicar Filtro", use_container_width=True)
+            
+            st.markdown("---")
+            
+            # Análisis masivo de URLs
+            st.subheader("🔍 Análisis Masivo de URLs")
+            urls_input = st.text_area(
+                "Ingrese las URLs (una por línea)",
+                height=150,
+                placeholder="https://ejemplo1.com\nhttps://ejemplo2.com"
             )
-        
-        apply_filter = st.button("📊 Aplicar Filtro", use_container_width=True)
-        
-        st.markdown("---")
-        
-        # Análisis masivo de URLs
-        st.subheader("🔍 Análisis Masivo de URLs")
-        urls_input = st.text_area(
-            "Ingrese las URLs (una por línea)",
-            height=150,
-            placeholder="https://ejemplo1.com\nhttps://ejemplo2.com"
-        )
-        
-        analyze_button = st.button("🚀 Analizar URLs", use_container_width=True)
+            
+            analyze_button = st.form_submit_button("🚀 Analizar URLs", use_container_width=True)
     
     # Convert dates to ISO format
     start_date_iso = start_date.isoformat()
@@ -303,19 +548,46 @@ def main():
         urls = [url.strip() for url in urls_input.split('\n') if url.strip()]
         
         if urls:
+            # Contar desde datos frescos, no desde la caché de _get_json
+            _get_json.clear()
+            baseline = fetch_statistics(start_date_iso, end_date_iso) or {}
+            
+            # Mostrar cada resultado en cuanto llega
+            progress = st.empty()
+            cards = []
+            
+            def show_result(index, item):
+                cards.append(render_result_card(index + 1, item))
+                progress.markdown("".join(cards), unsafe_allow_html=True)
+            
             with st.spinner(f"🔄 Analizando {len(urls)} URLs..."):
-                result = analyze_bulk_urls(urls)
+                result = analyze_bulk_urls(urls, on_result=show_result)
+            
+            progress.empty()
             
             if result:
+                # Los análisis nuevos invalidan las respuestas en caché
+                _get_json.clear()
+                
                 # Mostrar resultados
+                st.session_state['bulk_result'] = result
                 display_analysis_results(result)
                 
                 # Actualizar datos
                 with st.spinner("🔄 Actualizando estadísticas..."):
-                    time.sleep(2)  # Dar tiempo a Supabase
-                    st.session_state.statistics = fetch_statistics(start_date_iso, end_date_iso)
-                    st.session_state.analyses = fetch_analyses(start_date_iso, end_date_iso)
-                    st.session_state.daily_counts = fetch_daily_counts(start_date_iso, end_date_iso)
+                    # Esperar a que Supabase refleje los análisis nuevos,
+                    # solo si el rango incluye el día de hoy y hubo análisis nuevos
+                    if end_date >= today and result['analyzed']:
+                        wait_for_new_analyses(
+                            start_date_iso,
+                            end_date_iso,
+                            baseline.get('total_analyses', 0) + result['analyzed']
+                        )
+                    (
+                        st.session_state.statistics,
+                        st.session_state.analyses,
+                        st.session_state.daily_counts
+                    ) = load_dashboard_data(start_date_iso, end_date_iso)
                 
                 st.success("✅ Dashboard actualizado exitosamente")
                 st.markdown("---")
@@ -326,13 +598,18 @@ def main():
                 st.error("❌ Error al realizar el análisis masivo")
         else:
             st.warning("⚠️ Por favor ingresa al menos una URL")
+    elif 'bulk_result' in st.session_state:
+        # Mantener visibles los resultados del último análisis
+        display_analysis_results(st.session_state['bulk_result'])
     
     # Fetch data
     if apply_filter or 'statistics' not in st.session_state:
         with st.spinner("Cargando datos..."):
-            st.session_state.statistics = fetch_statistics(start_date_iso, end_date_iso)
-            st.session_state.analyses = fetch_analyses(start_date_iso, end_date_iso)
-            st.session_state.daily_counts = fetch_daily_counts(start_date_iso, end_date_iso)
+            (
+                st.session_state.statistics,
+                st.session_state.analyses,
+                st.session_state.daily_counts
+            ) = load_dashboard_data(start_date_iso, end_date_iso)
     
     statistics = st.session_state.get('statistics')
     analyses = st.session_state.get('analyses')
@@ -384,168 +661,114 @@ def main():
     # Charts
     st.subheader("📊 Visualizaciones")
     
+    # Charts offered in the ZIP download, keyed by file name
+    charts = {}
+    
     # Row 1: Risk and Confidence Distribution
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### Distribución de Riesgos")
-        risk_chart = chart_gen.create_risk_distribution_chart(
+        risk_chart = build_chart(
+            'risk_distribution_chart',
             statistics.get('risk_distribution', {})
         )
         st.plotly_chart(risk_chart, use_container_width=True, key="risk_dist")
-        
-        risk_chart_bytes = risk_chart.to_image(format="png")
-        st.download_button(
-            label="💾 Descargar Gráfico",
-            data=risk_chart_bytes,
-            file_name="distribucion_riesgos.png",
-            mime="image/png",
-            key="download_risk"
-        )
+        charts['distribucion_riesgos'] = risk_chart
     
     with col2:
         st.markdown("### Distribución de Confianza")
-        conf_chart = chart_gen.create_confidence_distribution_chart(
+        conf_chart = build_chart(
+            'confidence_distribution_chart',
             statistics.get('confidence_distribution', {})
         )
         st.plotly_chart(conf_chart, use_container_width=True, key="conf_dist")
-        
-        conf_chart_bytes = conf_chart.to_image(format="png")
-        st.download_button(
-            label="💾 Descargar Gráfico",
-            data=conf_chart_bytes,
-            file_name="distribucion_confianza.png",
-            mime="image/png",
-            key="download_conf"
-        )
+        charts['distribucion_confianza'] = conf_chart
     
     # Row 2: Phishing Overview and Sources Usage
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### Resumen de Detección de Phishing")
-        phishing_chart = chart_gen.create_phishing_detection_pie(statistics)
+        phishing_chart = build_chart('phishing_detection_pie', statistics)
         st.plotly_chart(phishing_chart, use_container_width=True, key="phishing_pie")
-        
-        phishing_chart_bytes = phishing_chart.to_image(format="png")
-        st.download_button(
-            label="💾 Descargar Gráfico",
-            data=phishing_chart_bytes,
-            file_name="resumen_phishing.png",
-            mime="image/png",
-            key="download_phishing"
-        )
+        charts['resumen_phishing'] = phishing_chart
     
     with col2:
         st.markdown("### Uso de Fuentes")
-        sources_chart = chart_gen.create_sources_usage_chart(
+        sources_chart = build_chart(
+            'sources_usage_chart',
             statistics.get('sources_usage', {})
         )
         st.plotly_chart(sources_chart, use_container_width=True, key="sources_usage")
-        
-        sources_chart_bytes = sources_chart.to_image(format="png")
-        st.download_button(
-            label="💾 Descargar Gráfico",
-            data=sources_chart_bytes,
-            file_name="uso_fuentes.png",
-            mime="image/png",
-            key="download_sources"
-        )
+        charts['uso_fuentes'] = sources_chart
     
     # Row 3: Daily Trend
     if daily_counts and daily_counts.get('data'):
         st.markdown("### Tendencia Diaria de Análisis")
-        daily_chart = chart_gen.create_daily_trend_chart(daily_counts['data'])
+        daily_chart = build_chart('daily_trend_chart', daily_counts['data'])
         st.plotly_chart(daily_chart, use_container_width=True, key="daily_trend")
-        
-        daily_chart_bytes = daily_chart.to_image(format="png")
-        st.download_button(
-            label="💾 Descargar Gráfico",
-            data=daily_chart_bytes,
-            file_name="tendencia_diaria.png",
-            mime="image/png",
-            key="download_daily"
-        )
+        charts['tendencia_diaria'] = daily_chart
     
     # Row 4: Risk Score Histogram
     if analyses and analyses.get('data'):
         st.markdown("### Distribución de Puntuación de Riesgo (Histograma)")
-        hist_chart = chart_gen.create_risk_score_histogram(analyses['data'])
+        hist_chart = build_chart('risk_score_histogram', analyses['data'])
         st.plotly_chart(hist_chart, use_container_width=True, key="risk_hist")
-        
-        hist_chart_bytes = hist_chart.to_image(format="png")
-        st.download_button(
-            label="💾 Descargar Gráfico",
-            data=hist_chart_bytes,
-            file_name="histograma_riesgo.png",
-            mime="image/png",
-            key="download_hist"
-        )
+        charts['histograma_riesgo'] = hist_chart
+    
+    chart_downloads(charts)
     
     st.markdown("---")
     
     # PDF Report Generation
     st.subheader("📄 Generar Informe PDF")
     
-    if st.button("🔄 Generar Informe PDF", use_container_width=True):
-        with st.spinner("Generando informe PDF..."):
-            try:
-                charts = {
-                    'risk_distribution': chart_gen.create_risk_distribution_chart(
-                        statistics.get('risk_distribution', {})
-                    ),
-                    'confidence_distribution': chart_gen.create_confidence_distribution_chart(
-                        statistics.get('confidence_distribution', {})
-                    ),
-                    'phishing_pie': chart_gen.create_phishing_detection_pie(statistics),
-                    'sources_usage': chart_gen.create_sources_usage_chart(
-                        statistics.get('sources_usage', {})
-                    )
-                }
-                
-                pdf_gen = PDFReportGenerator()
-                output_path = os.path.join(tempfile.gettempdir(), "phishing_report.pdf")
-                
-                pdf_gen.generate_report(
-                    statistics=statistics,
-                    charts=charts,
-                    date_range={
-                        'start': start_date_iso,
-                        'end': end_date_iso
-                    },
-                    output_path=output_path
-                )
-                
-                with open(output_path, "rb") as pdf_file:
-                    st.download_button(
-                        label="📥 Descargar Informe PDF",
-                        data=pdf_file,
-                        file_name=f"informe_phishing_{start_date_iso}_a_{end_date_iso}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
-                
-                st.success("✅ ¡Informe PDF generado exitosamente!")
-                
-            except Exception as e:
-                st.error(f"Error al generar el PDF: {e}")
+    # Only the plotly renderer exports figures; reuse the ones on the page
+    pdf_charts = None
+    if PDF_CHART_RENDERER == "plotly":
+        pdf_charts = {
+            'risk_distribution': risk_chart,
+            'confidence_distribution': conf_chart,
+            'phishing_pie': phishing_chart,
+            'sources_usage': sources_chart
+        }
+    
+    pdf_report_section(
+        statistics,
+        pdf_charts,
+        {
+            'start': start_date_iso,
+            'end': end_date_iso
+        }
+    )
     
     # Data Table
     if analyses and analyses.get('data'):
         st.markdown("---")
         st.subheader("📋 Análisis Recientes")
         
-        df = pd.DataFrame(analyses['data'])
+        # Build only the displayed columns for the first 50 rows
+        rows = analyses['data'][:50]
         
         display_columns = [
             'analysis_date', 'is_phishing', 'risk_score', 
             'confidence_level', 'sources_checked'
         ]
         
-        display_columns = [col for col in display_columns if col in df.columns]
+        df = pd.DataFrame({
+            col: [row.get(col) for row in rows]
+            for col in display_columns
+            if col in rows[0]
+        })
+        
+        if 'analysis_date' in df:
+            df['analysis_date'] = pd.to_datetime(
+                df['analysis_date'], utc=True, errors='coerce', cache=True
+            )
         
         st.dataframe(
-            df[display_columns].head(50),
+            df,
             use_container_width=True,
             height=400
         )
@@ -38,4 +38,90 @@ CREATE TABLE IF NOT EXISTS public.analysis_results (
 -- Índices básicos para analysis_results
 CREATE INDEX IF NOT EXISTS idx_analysis_results_url_id ON public.analysis_results(url_id);
 CREATE INDEX IF NOT EXISTS idx_analysis_results_analysis_date ON public.analysis_results(analysis_date DESC);
-CREATE INDEX IF NOT EXISTS idx_analysis_results_is_phishing ON public.analysis_results(is_phishing);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_analysis_results_is_phishing ON public.analysis_results(is_phishing);
+
+
+-- Funciones de agregación para estadísticas (llamadas vía RPC desde el backend)
+-- p_start / p_end en NULL significa sin filtro de fechas
+CREATE OR REPLACE FUNCTION public.get_stats(
+  p_start timestamp with time zone DEFAULT NULL,
+  p_end timestamp with time zone DEFAULT NULL
+)
+RETURNS json
+LANGUAGE sql STABLE
+AS $$
+  SELECT json_build_object(
+    'total', count(*),
+    'phishing', count(*) FILTER (WHERE is_phishing),
+    'avg_risk', coalesce(avg(risk_score), 0),
+    'low', count(*) FILTER (WHERE risk_score < 40),
+    'medium', count(*) FILTER (WHERE risk_score BETWEEN 40 AND 69),
+    'high', count(*) FILTER (WHERE risk_score >= 70)
+  )
+  FROM public.analysis_results
+  WHERE (p_start IS NULL OR analysis_date >= p_start)
+    AND (p_end IS NULL OR analysis_date <= p_end);
+$$;
+
+CREATE OR REPLACE FUNCTION public.get_confidence_distribution(
+  p_start timestamp with time zone DEFAULT NULL,
+  p_end timestamp with time zone DEFAULT NULL
+)
+RETURNS json
+LANGUAGE sql STABLE
+AS $$
+  SELECT coalesce(json_object_agg(confidence_level, total), '{}'::json)
+  FROM (
+    SELECT confidence_level, count(*) AS total
+    FROM public.analysis_results
+    WHERE (p_start IS NULL OR analysis_date >= p_start)
+      AND (p_end IS NULL OR analysis_date <= p_end)
+    GROUP BY confidence_level
+  ) AS counts;
+$$;
+
+CREATE OR REPLACE FUNCTION public.get_sources_usage(
+  p_start timestamp with time zone DEFAULT NULL,
+  p_end timestamp with time zone DEFAULT NULL
+)
+RETURNS json
+LANGUAGE sql STABLE
+AS $$
+  SELECT coalesce(json_object_agg(source, total), '{}'::json)
+  FROM (
+    SELECT trim(source) AS source, count(*) AS total
+    FROM public.analysis_results, unnest(sources_checked) AS source
+    WHERE (p_start IS NULL OR analysis_date >= p_start)
+      AND (p_end IS NULL OR analysis_date <= p_end)
+    GROUP BY trim(source)
+  ) AS counts;
+$$;
+
+
+-- Estadísticas completas en un solo round-trip para /api/statistics
+CREATE OR REPLACE FUNCTION public.get_full_stats(
+  p_start timestamp with time zone DEFAULT NULL,
+  p_end timestamp with time zone DEFAULT NULL
+)
+RETURNS json
+LANGUAGE sql STABLE
+AS $$
+  SELECT json_build_object(
+    'stats', public.get_stats(p_start, p_end),
+    'confidence_distribution', public.get_confidence_distribution(p_start, p_end),
+    'sources_usage', public.get_sources_usage(p_start, p_end)
+  );
+$$;
+
+
+-- Índice por día para agrupar y filtrar el conteo diario
+CREATE INDEX IF NOT EXISTS idx_analysis_results_day
+  ON public.analysis_results(((analysis_date AT TIME ZONE 'UTC')::date));
+
+-- Conteo diario para /api/daily-counts (vista normal: siempre al día
+-- tras insertar análisis nuevos)
+CREATE OR REPLACE VIEW public.daily_analysis_counts AS
+  SELECT (analysis_date AT TIME ZONE 'UTC')::date AS day, count(*) AS total
+  FROM public.analysis_results
+  WHERE analysis_date IS NOT NULL
+  GROUP BY 1;
\ No newline at end of file
@@ -0,0 +1,15 @@
+# Path: tests/conftest.py
+
+"""
+Test configuration: required settings and import path
+"""
+import os
+import sys
+from pathlib import Path
+
+# Settings() needs these to import the backend modules
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+os.environ.setdefault("N8N_WEBHOOK_URL", "http://localhost:5678/webhook/analyze-url")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
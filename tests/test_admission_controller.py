@@ -0,0 +1,46 @@
+# Path: tests/test_admission_controller.py
+
+"""
+Tests for the n8n admission controller
+"""
+import asyncio
+
+from backend.analysis_service import AdmissionController
+
+
+def test_cancelled_release_frees_slot_and_wakes_waiter():
+    """A release cancelled while waiting for the lock still frees its slot"""
+    async def scenario():
+        admission = AdmissionController(1)
+        await admission.acquire()
+        waiter = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        
+        # Hold the condition lock so release() has to wait for it
+        await admission._cond.acquire()
+        release = asyncio.ensure_future(admission.release())
+        await asyncio.sleep(0)
+        release.cancel()
+        await asyncio.sleep(0)
+        admission._cond.release()
+        
+        # The waiter is woken and takes the only slot
+        await asyncio.wait_for(waiter, timeout=1)
+        assert admission.active == 1
+    
+    asyncio.run(scenario())
+
+
+def test_release_wakes_waiter():
+    """Releasing a slot admits the next waiter"""
+    async def scenario():
+        admission = AdmissionController(1)
+        async with admission:
+            waiter = asyncio.ensure_future(admission.acquire())
+            await asyncio.sleep(0)
+            assert not waiter.done()
+        
+        await asyncio.wait_for(waiter, timeout=1)
+        assert admission.active == 1
+    
+    asyncio.run(scenario())
@@ -0,0 +1,32 @@
+# Path: utils/image_export.py
+
+"""
+Static image export for Plotly figures through one shared Kaleido session
+"""
+import threading
+import kaleido
+import plotly.graph_objects as go
+import plotly.io as pio
+
+
+# kaleido's sync server keeps one Chrome for the whole process (and closes
+# it at exit), but its request/response queues can't take concurrent
+# callers, so exports are serialized here
+_export_lock = threading.Lock()
+
+
+def figure_to_image(fig: go.Figure, **kwargs) -> bytes:
+    """
+    Export a figure with pio.to_image on the shared Kaleido server
+    
+    Args:
+        fig: Plotly figure to export
+        **kwargs: format, width, height and scale, as for pio.to_image
+        
+    Returns:
+        Image bytes
+    """
+    with _export_lock:
+        # No-op once running; otherwise every export would start its own Chrome
+        kaleido.start_sync_server(silence_warnings=True)
+        return pio.to_image(fig, **kwargs)
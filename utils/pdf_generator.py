@@ -9,71 +9,292 @@ from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Image, 
-    Table, TableStyle, PageBreak
+    Table, TableStyle, KeepTogether
 )
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from io import BytesIO
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union, BinaryIO
+from matplotlib.figure import Figure
+from matplotlib.ticker import MaxNLocator
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from svglib.svglib import svg2rlg
 import plotly.graph_objects as go
+import plotly.io as pio
+from utils.image_export import figure_to_image
+
+
+# Size of a chart on the page, in points (1/72 inch)
+CHART_WIDTH = 6 * inch
+CHART_HEIGHT = 3.86 * inch
+
+# Executive summary rows: (label, statistics key, value formatter)
+SUMMARY_FIELDS = (
+    ('Total Analyses', 'total_analyses', str),
+    ('Phishing Detected', 'phishing_detected', str),
+    ('Safe URLs', 'safe_urls', str),
+    ('Phishing Rate', 'phishing_percentage', lambda value: f"{value}%"),
+    ('Average Risk Score', 'avg_risk_score', str)
+)
+
+
+@lru_cache(maxsize=128)
+def _render_figure(
+    fig_json: str, 
+    width: int, 
+    height: int, 
+    scale: float = 1.0, 
+    image_format: str = "png"
+) -> bytes:
+    """Render a Plotly figure spec to image bytes, memoized by spec, size and format"""
+    return figure_to_image(
+        pio.from_json(fig_json), 
+        format=image_format, width=width, height=height, scale=scale
+    )
+
+
+def _chart_flowable(buffer: BytesIO, image_format: str):
+    """Wrap a rendered chart in a flowable sized to the chart box"""
+    if image_format == "svg":
+        # Vector charts are converted to native ReportLab drawings
+        drawing = svg2rlg(buffer)
+        drawing.scale(CHART_WIDTH / drawing.width, CHART_HEIGHT / drawing.height)
+        drawing.width, drawing.height = CHART_WIDTH, CHART_HEIGHT
+        return drawing
+    # Image wraps the buffer in a single ImageReader, which keeps a BytesIO
+    # as-is rather than reading it into a new one
+    return Image(buffer, width=CHART_WIDTH, height=CHART_HEIGHT)
+
+
+def _draw_bar(ax, labels: List[str], values: List[int], color, xlabel: str, ylabel: str):
+    """Draw a labelled bar chart in the ChartGenerator style"""
+    bars = ax.bar(labels, values, color=color)
+    ax.bar_label(bars)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.spines[['top', 'right']].set_visible(False)
+
+
+def _draw_pie(ax, labels: List[str], values: List[int], colors_map: List[str], **kwargs):
+    """Draw a pie chart, or a placeholder when every value is zero"""
+    if not any(values):
+        ax.text(0.5, 0.5, "No data available", ha='center', va='center', fontsize=16, color='gray')
+        ax.set_axis_off()
+        return
+    ax.pie(values, labels=labels, colors=colors_map, startangle=90, counterclock=False, **kwargs)
+
+
+def _draw_risk_distribution(ax, statistics: Dict[str, Any]):
+    """Bar chart of low/medium/high risk counts"""
+    risk_dist = statistics.get('risk_distribution', {})
+    _draw_bar(
+        ax,
+        ['Low Risk', 'Medium Risk', 'High Risk'],
+        [risk_dist.get('low', 0), risk_dist.get('medium', 0), risk_dist.get('high', 0)],
+        ['#2ecc71', '#f39c12', '#e74c3c'],
+        'Risk Category',
+        'Number of URLs'
+    )
+    ax.set_title('Risk Score Distribution')
+
+
+def _draw_confidence_distribution(ax, statistics: Dict[str, Any]):
+    """Donut chart of confidence levels"""
+    conf_dist = statistics.get('confidence_distribution', {})
+    _draw_pie(
+        ax,
+        ['Low', 'Medium', 'High'],
+        [conf_dist.get('low', 0), conf_dist.get('medium', 0), conf_dist.get('high', 0)],
+        ['#e74c3c', '#f39c12', '#2ecc71'],
+        autopct='%1.1f%%',
+        wedgeprops={'width': 0.7}
+    )
+    ax.set_title('Confidence Level Distribution')
+
+
+def _draw_phishing_pie(ax, statistics: Dict[str, Any]):
+    """Pie chart of phishing vs safe URLs"""
+    values = [statistics.get('phishing_detected', 0), statistics.get('safe_urls', 0)]
+    total = sum(values)
+    _draw_pie(
+        ax,
+        ['Phishing', 'Safe'],
+        values,
+        ['#e74c3c', '#2ecc71'],
+        autopct=lambda pct: f"{pct:.1f}%\n{round(pct * total / 100)}"
+    )
+    ax.set_title('Phishing Detection Overview')
+
+
+def _draw_sources_usage(ax, statistics: Dict[str, Any]):
+    """Bar chart of analysis sources usage"""
+    sources = statistics.get('sources_usage', {})
+    if sources:
+        _draw_bar(
+            ax,
+            list(sources.keys()),
+            list(sources.values()),
+            '#3498db',
+            'Source',
+            'Usage Count'
+        )
+    else:
+        ax.text(0.5, 0.5, "No data available", ha='center', va='center', fontsize=16, color='gray')
+        ax.set_axis_off()
+    ax.set_title('Analysis Sources Usage')
+
+
+# Report charts that can be drawn straight from the statistics payload
+_MATPLOTLIB_CHARTS = {
+    'risk_distribution': _draw_risk_distribution,
+    'confidence_distribution': _draw_confidence_distribution,
+    'phishing_pie': _draw_phishing_pie,
+    'sources_usage': _draw_sources_usage
+}
+
+
+def _render_with_matplotlib(
+    chart_key: str, 
+    statistics: Dict[str, Any], 
+    width: int, 
+    height: int, 
+    scale: float = 1.0, 
+    image_format: str = "png"
+) -> BytesIO:
+    """Render a report chart with matplotlib's Agg canvas (no Kaleido)"""
+    # Lay out at 72 dpi so width/height match points; scale adds pixel density
+    fig = Figure(figsize=(width / 72, height / 72), dpi=72 * scale, layout='tight')
+    _MATPLOTLIB_CHARTS[chart_key](fig.add_subplot(), statistics)
+    
+    # Hand the written buffer to ReportLab as-is instead of copying it out
+    buffer = BytesIO()
+    FigureCanvasAgg(fig).print_figure(buffer, format=image_format)
+    buffer.seek(0)
+    return buffer
 
 
 class PDFReportGenerator:
     """Generate PDF reports with charts and statistics"""
     
+    # Styles below are shared class attributes; only the executor is per-instance
+    __slots__ = ('_executor',)
+    
+    # Styles are immutable after construction, so build them once at import
+    styles = getSampleStyleSheet()
+    
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1f77b4'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=12,
+        spaceBefore=12
+    )
+    
+    normal_style = ParagraphStyle(
+        'CustomNormal',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=12
+    )
+    
+    SUMMARY_TABLE_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    
+    # Fixed summary table geometry (header row is taller from its padding),
+    # so the layout pass never has to measure cells
+    SUMMARY_COL_WIDTHS = (3*inch, 2*inch)
+    SUMMARY_ROW_HEIGHTS = (27,) + (18,) * len(SUMMARY_FIELDS)
+    
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        # Chart exports run concurrently instead of one after another
+        self._executor = ThreadPoolExecutor(max_workers=4)
     
-    def _setup_custom_styles(self):
-        """Setup custom paragraph styles"""
-        self.title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1f77b4'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
-        
-        self.heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#2c3e50'),
-            spaceAfter=12,
-            spaceBefore=12
-        )
-        
-        self.normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            spaceAfter=12
-        )
+    def _fig_to_image(
+        self, 
+        fig: go.Figure, 
+        width: int = 600, 
+        height: int = 400, 
+        scale: float = 1.0, 
+        image_format: str = "png"
+    ) -> BytesIO:
+        """Convert Plotly figure to an image buffer (cached by figure fingerprint)"""
+        # BytesIO shares the cached bytes object until written to, so no copy
+        return BytesIO(_render_figure(fig.to_json(), width, height, scale, image_format))
     
-    def _fig_to_image(self, fig: go.Figure, width: int = 600, height: int = 400) -> BytesIO:
-        """Convert Plotly figure to image bytes"""
-        img_bytes = fig.to_image(format="png", width=width, height=height)
-        return BytesIO(img_bytes)
+    def _render_chart(
+        self, 
+        chart_key: str, 
+        statistics: Dict[str, Any], 
+        fig: Optional[go.Figure], 
+        width: int, 
+        height: int, 
+        scale: float, 
+        image_format: str
+    ):
+        """Render one report chart and wrap it in a flowable (runs on the executor)"""
+        if fig is None:
+            buffer = _render_with_matplotlib(
+                chart_key, statistics, width, height, scale, image_format
+            )
+        else:
+            buffer = self._fig_to_image(fig, width, height, scale, image_format)
+        return _chart_flowable(buffer, image_format)
     
     def generate_report(
         self, 
         statistics: Dict[str, Any],
-        charts: Dict[str, go.Figure],
+        charts: Optional[Dict[str, go.Figure]],
         date_range: Dict[str, str],
-        output_path: str
+        output: Union[str, BinaryIO],
+        renderer: str = "matplotlib",
+        resolution: float = 1.0,
+        image_format: str = "svg",
+        compress: bool = True
     ):
         """
         Generate a complete PDF report
         
         Args:
             statistics: Statistics data
-            charts: Dictionary of Plotly figures
+            charts: Dictionary of Plotly figures (used by the "plotly"
+                renderer and for charts matplotlib cannot draw)
             date_range: Date range information
-            output_path: Path to save the PDF
+            output: Path to save the PDF, or a writable file-like object
+                (e.g. BytesIO) to keep the PDF in memory
+            renderer: "matplotlib" to draw charts from statistics, or
+                "plotly" to export the given figures through Kaleido
+            resolution: Chart pixel density relative to the page size
+                (1.0 = 72 dpi for screen; 2.0 or more for print); only
+                applies to raster image formats
+            image_format: "svg" to embed charts as vector drawings,
+                "png" to embed lossless raster images, or "jpeg" for
+                raster images ReportLab embeds as-is without re-encoding
+            compress: Flate-compress page content streams (vector charts
+                and text); raster images are always compressed by ReportLab
         """
-        doc = SimpleDocTemplate(output_path, pagesize=letter)
+        charts = charts or {}
+        doc = SimpleDocTemplate(output, pagesize=letter, pageCompression=int(compress))
         story = []
         
         # Title
@@ -87,7 +308,7 @@ class PDFReportGenerator:
         # Date Range
         date_info = Paragraph(
             f"<b>Report Period:</b> {date_range['start']} to {date_range['end']}<br/>"
-            f"<b>Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"<b>Generated:</b> {datetime.now().isoformat(' ', 'seconds')}",
             self.normal_style
         )
         story.append(date_info)
@@ -96,26 +317,17 @@ class PDFReportGenerator:
         # Summary Statistics
         story.append(Paragraph("Executive Summary", self.heading_style))
         
-        summary_data = [
-            ['Metric', 'Value'],
-            ['Total Analyses', str(statistics.get('total_analyses', 0))],
-            ['Phishing Detected', str(statistics.get('phishing_detected', 0))],
-            ['Safe URLs', str(statistics.get('safe_urls', 0))],
-            ['Phishing Rate', f"{statistics.get('phishing_percentage', 0)}%"],
-            ['Average Risk Score', str(statistics.get('avg_risk_score', 0))]
+        summary_data = [['Metric', 'Value']] + [
+            [label, fmt(statistics.get(key, 0))]
+            for label, key, fmt in SUMMARY_FIELDS
         ]
         
-        summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        summary_table = Table(
+            summary_data, 
+            colWidths=self.SUMMARY_COL_WIDTHS, 
+            rowHeights=self.SUMMARY_ROW_HEIGHTS
+        )
+        summary_table.setStyle(self.SUMMARY_TABLE_STYLE)
         
         story.append(summary_table)
         story.append(Spacer(1, 0.4*inch))
@@ -128,19 +340,45 @@ class PDFReportGenerator:
             ('sources_usage', 'Analysis Sources Usage')
         ]
         
-        for chart_key, chart_title in chart_sections:
-            if chart_key in charts:
-                story.append(PageBreak())
-                story.append(Paragraph(chart_title, self.heading_style))
-                story.append(Spacer(1, 0.2*inch))
-                
-                # Convert figure to image
-                img_buffer = self._fig_to_image(charts[chart_key], width=700, height=450)
-                img = Image(img_buffer, width=6*inch, height=3.86*inch)
-                story.append(img)
-                story.append(Spacer(1, 0.3*inch))
+        # Render charts at their on-page size; resolution only adds pixels
+        width, height = round(CHART_WIDTH), round(CHART_HEIGHT)
+        
+        # Only the sections the report can fill are rendered; extra entries
+        # in charts are never exported
+        use_matplotlib = renderer == "matplotlib"
+        needed = [
+            (chart_key, chart_title)
+            for chart_key, chart_title in chart_sections
+            if (use_matplotlib and chart_key in _MATPLOTLIB_CHARTS) or chart_key in charts
+        ]
+        
+        # Start every chart up front; workers also convert the export into
+        # its flowable, so collecting them in order below only waits
+        images = {
+            chart_key: self._executor.submit(
+                self._render_chart,
+                chart_key,
+                statistics,
+                None if use_matplotlib and chart_key in _MATPLOTLIB_CHARTS else charts[chart_key],
+                width, height, resolution, image_format
+            )
+            for chart_key, _ in needed
+        }
+        
+        # Keep each heading with its chart and let ReportLab paginate,
+        # instead of forcing a page per chart. Charts are popped off their
+        # futures so the story holds the only reference: doc.build consumes
+        # the story as it goes, freeing each chart once it is drawn
+        for chart_key, chart_title in needed:
+            story.append(KeepTogether([
+                Paragraph(chart_title, self.heading_style),
+                Spacer(1, 0.2*inch),
+                images.pop(chart_key).result()
+            ]))
+            story.append(Spacer(1, 0.3*inch))
         
-        # Build PDF
+        # Build PDF. Platypus layout (wrap/split) costs a few milliseconds
+        # here; build time is spent drawing the charts themselves
         doc.build(story)
         
-        return output_path
\ No newline at end of file
+        return output
\ No newline at end of file